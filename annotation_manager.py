@@ -6,13 +6,23 @@ Handles annotation storage and file operations
 import os
 
 
+# Home directory used to shorten saved video paths
+_HOME_DIR = os.path.expanduser("~")
+
+
 class AnnotationManager:
     """Manages annotations and saving to file"""
     
     def __init__(self):
         self.start_timestamp = None
         self.annotation_history = []
+        self._history_set = set()  # O(1) membership test for add_to_history
+        self._history_version = 0  # Bumped on every history insertion
         self.annotation_dir = None
+        self._fds = {}  # annotation_file -> O_APPEND file descriptor
+        self._video_path = None
+        self._video_path_str = None  # Video path as written to the annotation file
+        self._annotation_file = None
         
     def set_start(self, timestamp):
         """Set the start timestamp"""
@@ -32,28 +42,35 @@ class AnnotationManager:
     
     def add_to_history(self, annotation):
         """Add annotation to history if not already present"""
-        if annotation and annotation not in self.annotation_history:
+        if annotation and annotation not in self._history_set:
+            self._history_set.add(annotation)
             self.annotation_history.append(annotation)
+            self._history_version += 1
     
     def get_history(self):
         """Get annotation history"""
         return self.annotation_history
     
+    def history_delta(self, since_version):
+        """
+        Get history entries added after a previously seen version
+        Returns: tuple (version: int, new_items: list)
+        """
+        return self._history_version, self.annotation_history[since_version:]
+    
     def set_directory(self, directory):
         """Set custom annotation directory"""
-        self.annotation_dir = directory
+        self.annotation_dir = os.fspath(directory) if directory else None
+        if self._video_path:
+            self.set_video_path(self._video_path)
     
     def get_directory(self):
         """Get current annotation directory"""
         return self.annotation_dir
     
-    def save_annotation(self, video_path, start_time_str, end_time_str, annotation_text):
-        """
-        Save annotation to file
-        Returns: tuple (success: bool, file_path: str or None, error_message: str or None)
-        """
-        if not video_path:
-            return False, None, "No video loaded"
+    def set_video_path(self, video_path):
+        """Resolve the annotation file and saved video path for a loaded video"""
+        video_path = os.fspath(video_path)
         
         # Determine annotation directory
         if self.annotation_dir:
@@ -66,21 +83,108 @@ class AnnotationManager:
         annotation_file = os.path.join(annot_dir, f"{video_name}_annotations.txt")
         
         # Determine video path format (relative if in home, absolute otherwise)
-        home_dir = os.path.expanduser("~")
         abs_video_path = os.path.abspath(video_path)
         
-        if abs_video_path.startswith(home_dir):
+        if abs_video_path.startswith(_HOME_DIR):
             # Use relative path from home
-            video_path_str = os.path.relpath(abs_video_path, home_dir)
+            video_path_str = os.path.relpath(abs_video_path, _HOME_DIR)
         else:
             # Use absolute path
             video_path_str = abs_video_path
         
+        self._video_path = video_path
+        self._video_path_str = video_path_str
+        self._annotation_file = annotation_file
+    
+    def _get_fd(self, annotation_file):
+        """
+        Get the append-only file descriptor for an annotation file, opening it once
+        The file is reopened if it was deleted, renamed or replaced since it was opened.
+        """
+        fd = self._fds.get(annotation_file)
+        if fd is not None and not self._is_current(fd, annotation_file):
+            del self._fds[annotation_file]
+            os.close(fd)
+            fd = None
+        if fd is None:
+            fd = os.open(annotation_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+            self._fds[annotation_file] = fd
+        return fd
+    
+    def _is_current(self, fd, annotation_file):
+        """Check that an open descriptor still refers to the file at annotation_file"""
         try:
-            # Append annotation
-            with open(annotation_file, 'a', encoding='utf-8') as f:
-                f.write(f"{video_path_str}\t{start_time_str}\t{end_time_str}\t{annotation_text}\n")
+            path_stat = os.stat(annotation_file)
+        except FileNotFoundError:
+            return False
+        fd_stat = os.fstat(fd)
+        return (fd_stat.st_ino, fd_stat.st_dev) == (path_stat.st_ino, path_stat.st_dev)
+    
+    def save_annotation(self, video_path, start_time_str, end_time_str, annotation_text, sync=False):
+        """
+        Save annotation to file
+        Each line is appended with a single write to a file descriptor kept open
+        between saves; pass sync=True to also fsync it before returning.
+        Returns: tuple (success: bool, file_path: str or None, error_message: str or None)
+        """
+        if not video_path:
+            return False, None, "No video loaded"
+        
+        video_path = os.fspath(video_path)
+        if video_path != self._video_path:
+            self.set_video_path(video_path)
+        annotation_file = self._annotation_file
+        
+        line = f"{self._video_path_str}\t{start_time_str}\t{end_time_str}\t{annotation_text}\n".encode('utf-8')
+        
+        try:
+            # O_APPEND makes each single write an atomic append on POSIX
+            fd = self._get_fd(annotation_file)
+            os.write(fd, line)
+            if sync:
+                os.fsync(fd)
+            
+            return True, annotation_file, None
+        except Exception as e:
+            return False, None, str(e)
+    
+    def save_annotations_bulk(self, video_path, rows, sync=False):
+        """
+        Save several annotations with a single write
+        rows: iterable of (start_time_str, end_time_str, annotation_text)
+        Returns: tuple (success: bool, file_path: str or None, error_message: str or None)
+        """
+        if not video_path:
+            return False, None, "No video loaded"
+        
+        video_path = os.fspath(video_path)
+        if video_path != self._video_path:
+            self.set_video_path(video_path)
+        annotation_file = self._annotation_file
+        
+        video_path_str = self._video_path_str
+        data = "".join(
+            f"{video_path_str}\t{start}\t{end}\t{text}\n" for start, end, text in rows
+        ).encode('utf-8')
+        
+        try:
+            fd = self._get_fd(annotation_file)
+            # Large buffers may be written in several chunks
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            if sync:
+                os.fsync(fd)
             
             return True, annotation_file, None
         except Exception as e:
             return False, None, str(e)
+    
+    def close(self):
+        """Close all open annotation files"""
+        for fd in self._fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fds.clear()
@@ -0,0 +1,140 @@
+"""
+GPU Player Module
+Handles hardware video decoding on NVIDIA GPUs through VPF (PyNvCodec)
+"""
+
+import cv2
+import numpy as np
+
+from video_player import PyAVPlayer
+
+try:
+    import PyNvCodec as nvc
+except ImportError:
+    # VPF is optional - create_player() falls back to CPU decoding without it
+    nvc = None
+
+
+class _NvDecCapture:
+    """Subset of the cv2.VideoCapture interface backed by NVDEC"""
+    
+    def __init__(self, file_path, gpu_id=0, display_size=None):
+        self.decoder = nvc.PyNvDecoder(file_path, gpu_id)
+        coded_width = self.decoder.Width()
+        coded_height = self.decoder.Height()
+        
+        # Scale down on the GPU so only display-sized frames cross PCIe (NV12 needs even sizes)
+        scale = 1.0
+        if display_size is not None:
+            scale = min(1.0, display_size[0] / coded_width, display_size[1] / coded_height)
+        self.width = max(2, int(coded_width * scale) & ~1)
+        self.height = max(2, int(coded_height * scale) & ~1)
+        self.resizer = None
+        if (self.width, self.height) != (coded_width, coded_height):
+            self.resizer = nvc.PySurfaceResizer(self.width, self.height, nvc.PixelFormat.NV12, gpu_id)
+        
+        # Color conversion and download of the decoded NV12 surfaces
+        self.converter = nvc.PySurfaceConverter(self.width, self.height, nvc.PixelFormat.NV12,
+                                                nvc.PixelFormat.BGR, gpu_id)
+        self.cc_ctx = self._color_context(coded_height)
+        self.downloader = nvc.PySurfaceDownloader(self.width, self.height, nvc.PixelFormat.BGR, gpu_id)
+        
+        self._grabbed = None
+        self._seek_frame = None  # Applied by the next grab()
+        self._position = 0  # Index of the next frame to be grabbed
+    
+    def _color_context(self, coded_height):
+        """Conversion context for the stream's color space, guessing from the size when unset"""
+        space = self.decoder.ColorSpace()
+        if space not in (nvc.ColorSpace.BT_601, nvc.ColorSpace.BT_709):
+            # Untagged HD streams are almost always BT.709, SD ones BT.601
+            space = nvc.ColorSpace.BT_709 if coded_height >= 720 else nvc.ColorSpace.BT_601
+        color_range = self.decoder.ColorRange()
+        if color_range != nvc.ColorRange.JPEG:
+            color_range = nvc.ColorRange.MPEG
+        return nvc.ColorspaceConversionContext(space, color_range)
+    
+    def isOpened(self):
+        return self.decoder is not None
+    
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return self.decoder.Numframes()
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.decoder.Framerate()
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return self._position
+        return 0
+    
+    def set(self, prop_id, value):
+        if prop_id != cv2.CAP_PROP_POS_FRAMES:
+            return False
+        self._seek_frame = int(value)
+        return True
+    
+    def grab(self):
+        # Decode only - the surface stays on the GPU until retrieve()
+        if self._seek_frame is not None:
+            # The default seek mode stops at the previous keyframe - decode up to the frame itself
+            seek = nvc.SeekContext(seek_frame=self._seek_frame, mode=nvc.SeekMode.EXACT_FRAME)
+            surface = self.decoder.DecodeSingleSurface(seek)
+            self._position = self._seek_frame
+            self._seek_frame = None
+        else:
+            surface = self.decoder.DecodeSingleSurface()
+        
+        if surface.Empty():
+            self._grabbed = None
+            return False
+        self._grabbed = surface
+        self._position += 1
+        return True
+    
+    def retrieve(self, image=None):
+        if self._grabbed is None:
+            return False, None
+        
+        surface = self._grabbed
+        if self.resizer is not None:
+            surface = self.resizer.Execute(surface)
+            if surface.Empty():
+                return False, None
+        
+        bgr_surface = self.converter.Execute(surface, self.cc_ctx)
+        if bgr_surface.Empty():
+            return False, None
+        
+        frame = np.empty(self.width * self.height * 3, np.uint8)
+        if not self.downloader.DownloadSingleSurface(bgr_surface, frame):
+            return False, None
+        return True, frame.reshape(self.height, self.width, 3)
+    
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+    
+    def release(self):
+        self.decoder = None
+        self._grabbed = None
+
+
+class NvDecPlayer(PyAVPlayer):
+    """VideoPlayer decoding on the GPU, falling back to CPU decoding when NVDEC is unavailable"""
+    
+    def __init__(self, gpu_id=0, display_size=None):
+        super().__init__(display_size)
+        self.gpu_id = gpu_id
+    
+    def _open_capture(self, file_path):
+        if nvc is not None:
+            try:
+                return _NvDecCapture(file_path, self.gpu_id, self.display_size)
+            except Exception:
+                # No CUDA device, or a codec NVDEC does not support
+                pass
+        return super()._open_capture(file_path)
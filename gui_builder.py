@@ -3,8 +3,155 @@ GUI Builder Module
 Constructs the user interface components
 """
 
+import types
 import tkinter as tk
 from tkinter import ttk
+from tkinter import font as tkfont
+
+
+# Grid sticky values
+_WE = (tk.W, tk.E)
+_WENS = (tk.W, tk.E, tk.N, tk.S)
+
+# Named fonts shared by all widgets: (font name, family, size, weight, slant)
+_NAMED_FONTS = (
+    ("FacsArial10", "Arial", 10, "normal", "roman"),
+    ("FacsArial10Bold", "Arial", 10, "bold", "roman"),
+    ("FacsArial10Italic", "Arial", 10, "normal", "italic"),
+    ("FacsArial11", "Arial", 11, "normal", "roman"),
+    ("FacsArial11Bold", "Arial", 11, "bold", "roman"),
+    ("FacsArial13Bold", "Arial", 13, "bold", "roman"),
+    ("FacsArial14", "Arial", 14, "normal", "roman"),
+    ("FacsArial18Bold", "Arial", 18, "bold", "roman"),
+)
+
+# Label styles referencing the named fonts: (style name, font name)
+_LABEL_STYLES = (
+    ("Normal10.TLabel", "FacsArial10"),
+    ("Bold10.TLabel", "FacsArial10Bold"),
+    ("Italic10.TLabel", "FacsArial10Italic"),
+    ("Normal11.TLabel", "FacsArial11"),
+    ("Bold11.TLabel", "FacsArial11Bold"),
+    ("Bold13.TLabel", "FacsArial13Bold"),
+    ("Normal14.TLabel", "FacsArial14"),
+    ("Bold18.TLabel", "FacsArial18Bold"),
+)
+
+# Widget specs: (name, widget class, widget options, grid options)
+# Widgets with a name of None are static and not added to the widget namespace
+_FILE_WIDGETS = (
+    ("file_label", ttk.Label, {"text": "No video loaded", "style": "Normal11.TLabel"},
+     {"row": 0, "column": 0, "sticky": tk.W, "padx": 5}),
+    ("load_btn", ttk.Button, {"text": "📁 Load Video", "width": 15},
+     {"row": 0, "column": 1, "padx": 5}),
+    # Annotation directory
+    (None, ttk.Label, {"text": "Annotations:", "style": "Normal10.TLabel"},
+     {"row": 1, "column": 0, "sticky": tk.W, "padx": 5, "pady": (10, 0)}),
+    ("annot_dir_label", ttk.Label, {"text": "Same as video", "style": "Italic10.TLabel"},
+     {"row": 2, "column": 0, "sticky": tk.W, "padx": 5}),
+    ("annot_dir_btn", ttk.Button, {"text": "📂 Set Directory", "width": 15},
+     {"row": 1, "column": 1, "rowspan": 2, "padx": 5}),
+)
+
+# Box the video canvas is fitted into (16:9) once a video is loaded
+CANVAS_MAX_WIDTH = 960
+CANVAS_MAX_HEIGHT = 540
+
+# Canvas for video display, kept at 1x1 until resize_canvas() is called
+_CANVAS_WIDGETS = (
+    ("canvas", tk.Canvas, {"bg": "#2d2d2d", "width": 1, "height": 1,
+                           "highlightthickness": 0, "relief": tk.FLAT},
+     {"row": 0, "column": 0, "pady": (0, 10)}),
+)
+
+# Navigation bar (scrubber) with modern styling
+_NAV_BAR_WIDGETS = (
+    ("nav_scale", tk.Scale, {"from_": 0, "to": 100, "orient": tk.HORIZONTAL, "showvalue": False,
+                             "relief": tk.FLAT, "length": 800, "bg": "#007acc", "fg": "#007acc",
+                             "troughcolor": "#1e1e1e", "activebackground": "#1177bb",
+                             "highlightthickness": 0, "sliderrelief": tk.FLAT, "width": 15},
+     {"row": 0, "column": 0, "sticky": _WE, "padx": 10}),
+)
+
+_TIMESTAMP_WIDGETS = (
+    (None, ttk.Label, {"text": "Current Timestamp:", "style": "Normal10.TLabel"},
+     {"row": 0, "column": 0, "padx": 5}),
+    ("timestamp_label", ttk.Label, {"text": "00:00:00.000", "style": "Bold18.TLabel", "foreground": "#007acc"},
+     {"row": 0, "column": 1, "padx": 5}),
+    (None, ttk.Label, {"text": "Frame:", "style": "Normal10.TLabel"},
+     {"row": 0, "column": 2, "padx": (20, 5)}),
+    ("frame_label", ttk.Label, {"text": "0 / 0", "style": "Normal14.TLabel"},
+     {"row": 0, "column": 3, "padx": 5}),
+)
+
+# Time skip buttons in display order: (name, text, seconds)
+SKIP_BUTTONS = (
+    ("skip_30s_back_btn", "<< 30s", -30),
+    ("skip_5s_back_btn", "< 5s", -5),
+    ("skip_1s_back_btn", "< 1s", -1),
+    ("skip_1s_fwd_btn", "1s >", 1),
+    ("skip_5s_fwd_btn", "5s >", 5),
+    ("skip_30s_fwd_btn", "30s >>", 30),
+)
+_PLAY_COLUMN = 3  # Play/Pause sits between the backward and forward skips
+
+_SKIP_BUTTON_WIDGETS = tuple(
+    (name, ttk.Button, {"text": text, "width": 8},
+     {"row": 0, "column": col + (col >= _PLAY_COLUMN), "padx": 2})
+    for col, (name, text, _) in enumerate(SKIP_BUTTONS)
+)
+
+# First line: Time skip controls with play/pause in center
+_TIME_SKIP_WIDGETS = _SKIP_BUTTON_WIDGETS[:_PLAY_COLUMN] + (
+    ("play_btn", ttk.Button, {"text": "▶ Play", "width": 14, "style": "Accent.TButton"},
+     {"row": 0, "column": _PLAY_COLUMN, "padx": 10}),
+) + _SKIP_BUTTON_WIDGETS[_PLAY_COLUMN:]
+
+# Second line: Frame navigation
+_FRAME_NAV_WIDGETS = (
+    ("prev_frame_btn", ttk.Button, {"text": "◄ Previous Frame", "width": 18}, {"row": 0, "column": 0, "padx": 5}),
+    ("next_frame_btn", ttk.Button, {"text": "Next Frame ►", "width": 18}, {"row": 0, "column": 1, "padx": 5}),
+)
+
+_ANNOTATION_WIDGETS = (
+    # Annotation entry
+    (None, ttk.Label, {"text": "Annotation:", "style": "Bold11.TLabel"},
+     {"row": 0, "column": 0, "padx": 5, "sticky": tk.W}),
+    ("annotation_entry", ttk.Entry, {"width": 50, "font": "FacsArial11"},
+     {"row": 0, "column": 1, "padx": 5, "sticky": _WE, "pady": 5}),
+    # Annotation history dropdown
+    (None, ttk.Label, {"text": "Recent:", "style": "Normal10.TLabel"},
+     {"row": 0, "column": 2, "padx": 5}),
+    ("annotation_combo", ttk.Combobox, {"width": 30, "state": "readonly", "font": "FacsArial10"},
+     {"row": 0, "column": 3, "padx": 5}),
+)
+
+# Control buttons
+_ANNOTATION_BUTTON_WIDGETS = (
+    ("start_btn", ttk.Button, {"text": "⏱ Start Here", "style": "Accent.TButton", "width": 15},
+     {"row": 0, "column": 0, "padx": 5}),
+    ("end_btn", ttk.Button, {"text": "💾 End/Save Here", "style": "Accent.TButton", "width": 15},
+     {"row": 0, "column": 1, "padx": 5}),
+    ("clear_btn", ttk.Button, {"text": "🗑 Clear", "width": 12},
+     {"row": 0, "column": 2, "padx": 5}),
+)
+
+# Status display with modern styling
+_ANNOTATION_STATUS_WIDGETS = (
+    (None, ttk.Label, {"text": "Start:", "style": "Bold10.TLabel"},
+     {"row": 0, "column": 0, "padx": (0, 5)}),
+    ("start_label", ttk.Label, {"text": "Not set", "style": "Bold13.TLabel", "foreground": "#ff6b6b"},
+     {"row": 0, "column": 1, "padx": 5}),
+    (None, ttk.Label, {"text": "End:", "style": "Bold10.TLabel"},
+     {"row": 0, "column": 2, "padx": (20, 5)}),
+    ("end_label", ttk.Label, {"text": "Not set", "style": "Bold13.TLabel", "foreground": "#ff6b6b"},
+     {"row": 0, "column": 3, "padx": 5}),
+)
+
+_STATUS_BAR_WIDGETS = (
+    ("status_bar", ttk.Label, {"text": "Ready", "relief": tk.FLAT, "style": "Normal10.TLabel", "padding": 5},
+     {"row": 5, "column": 0, "sticky": _WE}),
+)
 
 
 class GUIBuilder:
@@ -12,13 +159,20 @@ class GUIBuilder:
     
     def __init__(self, root):
         self.root = root
-        self.widgets = {}
+        self.widgets = types.SimpleNamespace()
+        self._fonts = []  # Named fonts are deleted when their Font object is collected
+        
+    def build_gui(self, on_ready=None):
+        """
+        Build the GUI and return the (live) widget namespace
+        Only the file and video sections are built immediately; the remaining
+        sections are built once Tk is idle, after which on_ready() is called.
+        """
+        self._configure_fonts()
         
-    def build_gui(self):
-        """Build the complete GUI and return widget dictionary"""
         # Main container with dark theme
         main_container = ttk.Frame(self.root, padding="15")
-        main_container.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        main_container.grid(row=0, column=0, sticky=_WENS)
         
         # Configure grid weights
         self.root.columnconfigure(0, weight=1)
@@ -26,85 +180,82 @@ class GUIBuilder:
         main_container.columnconfigure(0, weight=1)
         main_container.rowconfigure(1, weight=1)
         
-        # Build sections
+        # Build visible sections now, defer the rest until after first paint
         self._build_file_section(main_container)
         self._build_video_section(main_container)
-        self._build_timestamp_section(main_container)
-        self._build_navigation_section(main_container)
-        self._build_annotation_section(main_container)
-        self._build_status_bar(main_container)
+        self.root.after_idle(self._build_deferred_sections, main_container, on_ready)
         
         return self.widgets
     
+    def _configure_fonts(self):
+        """Create the shared named fonts and the label styles that use them"""
+        for name, family, size, weight, slant in _NAMED_FONTS:
+            self._fonts.append(tkfont.Font(root=self.root, name=name, family=family,
+                                           size=size, weight=weight, slant=slant))
+        
+        style = ttk.Style(self.root)
+        for style_name, font_name in _LABEL_STYLES:
+            style.configure(style_name, font=font_name)
+    
+    def resize_canvas(self, video_width, video_height):
+        """Size the video canvas to the video aspect ratio within the default display box"""
+        if video_width <= 0 or video_height <= 0:
+            width, height = CANVAS_MAX_WIDTH, CANVAS_MAX_HEIGHT
+        else:
+            scale = min(CANVAS_MAX_WIDTH / video_width, CANVAS_MAX_HEIGHT / video_height)
+            width = max(1, int(video_width * scale))
+            height = max(1, int(video_height * scale))
+        self.widgets.canvas.config(width=width, height=height)
+    
+    def _build_deferred_sections(self, parent, on_ready):
+        """Build the sections skipped by build_gui"""
+        self._build_timestamp_section(parent)
+        self._build_navigation_section(parent)
+        self._build_annotation_section(parent)
+        self._build_status_bar(parent)
+        
+        if on_ready is not None:
+            on_ready()
+    
+    def _place(self, parent, specs):
+        """Create and grid widgets from a spec table"""
+        widgets = self.widgets
+        for name, widget_cls, options, grid_options in specs:
+            widget = widget_cls(parent, **options)
+            widget.grid(**grid_options)
+            if name is not None:
+                setattr(widgets, name, widget)
+    
     def _build_file_section(self, parent):
         """Build file controls section"""
         file_frame = ttk.LabelFrame(parent, text="Video File", padding="10")
-        file_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 15))
+        file_frame.grid(row=0, column=0, sticky=_WE, pady=(0, 15))
         file_frame.columnconfigure(0, weight=1)
         
-        self.widgets['file_label'] = ttk.Label(file_frame, text="No video loaded", 
-                                               font=("Arial", 11))
-        self.widgets['file_label'].grid(row=0, column=0, sticky=tk.W, padx=5)
-        
-        self.widgets['load_btn'] = ttk.Button(file_frame, text="📁 Load Video", width=15)
-        self.widgets['load_btn'].grid(row=0, column=1, padx=5)
-        
-        # Annotation directory
-        ttk.Label(file_frame, text="Annotations:", 
-                 font=("Arial", 10)).grid(row=1, column=0, sticky=tk.W, padx=5, pady=(10, 0))
-        self.widgets['annot_dir_label'] = ttk.Label(file_frame, text="Same as video", 
-                                                     font=("Arial", 10, "italic"))
-        self.widgets['annot_dir_label'].grid(row=2, column=0, sticky=tk.W, padx=5)
-        
-        self.widgets['annot_dir_btn'] = ttk.Button(file_frame, text="📂 Set Directory", width=15)
-        self.widgets['annot_dir_btn'].grid(row=1, column=1, rowspan=2, padx=5)
+        self._place(file_frame, _FILE_WIDGETS)
     
     def _build_video_section(self, parent):
         """Build video display section"""
         video_frame = ttk.LabelFrame(parent, text="Video Display", padding="10")
-        video_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 15))
+        video_frame.grid(row=1, column=0, sticky=_WENS, pady=(0, 15))
         video_frame.columnconfigure(0, weight=1)
         video_frame.rowconfigure(0, weight=0)
         video_frame.rowconfigure(1, weight=0)
         video_frame.rowconfigure(2, weight=0)
         
-        # Canvas for video display with 16:9 aspect ratio by default
-        # Will be adjusted based on actual video aspect ratio when loaded
-        default_width = 960
-        default_height = 540  # 16:9 aspect ratio
-        self.widgets['canvas'] = tk.Canvas(video_frame, bg="#2d2d2d", 
-                                          width=default_width, height=default_height,
-                                          highlightthickness=0, relief=tk.FLAT)
-        self.widgets['canvas'].grid(row=0, column=0, pady=(0, 10))
+        self._place(video_frame, _CANVAS_WIDGETS)
         
-        # Navigation bar (scrubber) with modern styling
         nav_bar_frame = ttk.Frame(video_frame)
-        nav_bar_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        nav_bar_frame.grid(row=1, column=0, sticky=_WE, pady=(0, 10))
         nav_bar_frame.columnconfigure(0, weight=1)
         
-        self.widgets['nav_scale'] = tk.Scale(
-            nav_bar_frame,
-            from_=0,
-            to=100,
-            orient=tk.HORIZONTAL,
-            showvalue=False,
-            relief=tk.FLAT,
-            length=800,
-            bg="#007acc",
-            fg="#007acc",
-            troughcolor="#1e1e1e",
-            activebackground="#1177bb",
-            highlightthickness=0,
-            sliderrelief=tk.FLAT,
-            width=15
-        )
-        self.widgets['nav_scale'].grid(row=0, column=0, sticky=(tk.W, tk.E), padx=10)
+        self._place(nav_bar_frame, _NAV_BAR_WIDGETS)
     
     def _build_timestamp_section(self, parent):
         """Build timestamp display section"""
         # Timestamp display with modern styling
         timestamp_frame = ttk.Frame(parent, padding="10")
-        timestamp_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(5, 10))
+        timestamp_frame.grid(row=2, column=0, sticky=_WE, pady=(5, 10))
         
         # Center the content
         timestamp_frame.columnconfigure(0, weight=1)
@@ -112,112 +263,38 @@ class GUIBuilder:
         content_frame = ttk.Frame(timestamp_frame)
         content_frame.grid(row=0, column=0)
         
-        ttk.Label(content_frame, text="Current Timestamp:", 
-                 font=("Arial", 10)).grid(row=0, column=0, padx=5)
-        self.widgets['timestamp_label'] = ttk.Label(content_frame, text="00:00:00.000", 
-                                                     font=("Arial", 18, "bold"),
-                                                     foreground="#007acc")
-        self.widgets['timestamp_label'].grid(row=0, column=1, padx=5)
-        
-        ttk.Label(content_frame, text="Frame:", 
-                 font=("Arial", 10)).grid(row=0, column=2, padx=(20, 5))
-        self.widgets['frame_label'] = ttk.Label(content_frame, text="0 / 0", 
-                                                font=("Arial", 14))
-        self.widgets['frame_label'].grid(row=0, column=3, padx=5)
+        self._place(content_frame, _TIMESTAMP_WIDGETS)
     
     def _build_navigation_section(self, parent):
         """Build navigation controls section"""
         nav_frame = ttk.LabelFrame(parent, text="Navigation Controls", padding="10")
-        nav_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=(0, 15))
+        nav_frame.grid(row=3, column=0, sticky=_WE, pady=(0, 15))
         nav_frame.columnconfigure(0, weight=1)
         
-        # First line: Time skip controls with play/pause in center
         first_line = ttk.Frame(nav_frame)
         first_line.grid(row=0, column=0, pady=(0, 8))
+        self._place(first_line, _TIME_SKIP_WIDGETS)
         
-        self.widgets['skip_30s_back_btn'] = ttk.Button(first_line, text="<< 30s", width=8)
-        self.widgets['skip_30s_back_btn'].grid(row=0, column=0, padx=2)
-        self.widgets['skip_5s_back_btn'] = ttk.Button(first_line, text="< 5s", width=8)
-        self.widgets['skip_5s_back_btn'].grid(row=0, column=1, padx=2)
-        self.widgets['skip_1s_back_btn'] = ttk.Button(first_line, text="< 1s", width=8)
-        self.widgets['skip_1s_back_btn'].grid(row=0, column=2, padx=2)
-        
-        # Play/Pause button in center
-        self.widgets['play_btn'] = ttk.Button(first_line, text="▶ Play", width=14, 
-                                             style="Accent.TButton")
-        self.widgets['play_btn'].grid(row=0, column=3, padx=10)
-        
-        self.widgets['skip_1s_fwd_btn'] = ttk.Button(first_line, text="1s >", width=8)
-        self.widgets['skip_1s_fwd_btn'].grid(row=0, column=4, padx=2)
-        self.widgets['skip_5s_fwd_btn'] = ttk.Button(first_line, text="5s >", width=8)
-        self.widgets['skip_5s_fwd_btn'].grid(row=0, column=5, padx=2)
-        self.widgets['skip_30s_fwd_btn'] = ttk.Button(first_line, text="30s >>", width=8)
-        self.widgets['skip_30s_fwd_btn'].grid(row=0, column=6, padx=2)
-        
-        # Second line: Frame navigation
         second_line = ttk.Frame(nav_frame)
         second_line.grid(row=1, column=0, pady=0)
-        
-        self.widgets['prev_frame_btn'] = ttk.Button(second_line, text="◄ Previous Frame", width=18)
-        self.widgets['prev_frame_btn'].grid(row=0, column=0, padx=5)
-        self.widgets['next_frame_btn'] = ttk.Button(second_line, text="Next Frame ►", width=18)
-        self.widgets['next_frame_btn'].grid(row=0, column=1, padx=5)
+        self._place(second_line, _FRAME_NAV_WIDGETS)
     
     def _build_annotation_section(self, parent):
         """Build annotation section"""
         annotation_frame = ttk.LabelFrame(parent, text="Annotation", padding="10")
-        annotation_frame.grid(row=4, column=0, sticky=(tk.W, tk.E), pady=(0, 15))
+        annotation_frame.grid(row=4, column=0, sticky=_WE, pady=(0, 15))
         annotation_frame.columnconfigure(1, weight=1)
         
-        # Annotation entry
-        ttk.Label(annotation_frame, text="Annotation:", 
-                 font=("Arial", 11, "bold")).grid(row=0, column=0, padx=5, sticky=tk.W)
-        self.widgets['annotation_entry'] = ttk.Entry(annotation_frame, width=50, 
-                                                     font=("Arial", 11))
-        self.widgets['annotation_entry'].grid(row=0, column=1, padx=5, sticky=(tk.W, tk.E), pady=5)
-        
-        # Annotation history dropdown
-        ttk.Label(annotation_frame, text="Recent:", 
-                 font=("Arial", 10)).grid(row=0, column=2, padx=5)
-        self.widgets['annotation_combo'] = ttk.Combobox(annotation_frame, width=30, 
-                                                       state="readonly", font=("Arial", 10))
-        self.widgets['annotation_combo'].grid(row=0, column=3, padx=5)
-        
-        # Control buttons
+        self._place(annotation_frame, _ANNOTATION_WIDGETS)
+        
         button_frame = ttk.Frame(annotation_frame)
         button_frame.grid(row=1, column=0, columnspan=4, pady=15)
+        self._place(button_frame, _ANNOTATION_BUTTON_WIDGETS)
         
-        self.widgets['start_btn'] = ttk.Button(button_frame, text="⏱ Start Here", 
-                                              style="Accent.TButton", width=15)
-        self.widgets['start_btn'].grid(row=0, column=0, padx=5)
-        
-        self.widgets['end_btn'] = ttk.Button(button_frame, text="💾 End/Save Here", 
-                                            style="Accent.TButton", width=15)
-        self.widgets['end_btn'].grid(row=0, column=1, padx=5)
-        
-        self.widgets['clear_btn'] = ttk.Button(button_frame, text="🗑 Clear", width=12)
-        self.widgets['clear_btn'].grid(row=0, column=2, padx=5)
-        
-        # Status display with modern styling
         status_frame = ttk.Frame(annotation_frame)
         status_frame.grid(row=2, column=0, columnspan=4, pady=(5, 0))
-        
-        ttk.Label(status_frame, text="Start:", 
-                 font=("Arial", 10, "bold")).grid(row=0, column=0, padx=(0, 5))
-        self.widgets['start_label'] = ttk.Label(status_frame, text="Not set", 
-                                               font=("Arial", 13, "bold"), 
-                                               foreground="#ff6b6b")
-        self.widgets['start_label'].grid(row=0, column=1, padx=5)
-        
-        ttk.Label(status_frame, text="End:", 
-                 font=("Arial", 10, "bold")).grid(row=0, column=2, padx=(20, 5))
-        self.widgets['end_label'] = ttk.Label(status_frame, text="Not set", 
-                                             font=("Arial", 13, "bold"), 
-                                             foreground="#ff6b6b")
-        self.widgets['end_label'].grid(row=0, column=3, padx=5)
+        self._place(status_frame, _ANNOTATION_STATUS_WIDGETS)
     
     def _build_status_bar(self, parent):
         """Build status bar"""
-        self.widgets['status_bar'] = ttk.Label(parent, text="Ready", relief=tk.FLAT,
-                                              font=("Arial", 10), padding=5)
-        self.widgets['status_bar'].grid(row=5, column=0, sticky=(tk.W, tk.E))
+        self._place(parent, _STATUS_BAR_WIDGETS)
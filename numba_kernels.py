@@ -0,0 +1,39 @@
+"""
+Numba Kernels Module
+Optional JIT-compiled pixel kernels for the display path
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    # Numba is optional - callers fall back to OpenCV when kernels are None
+    njit = None
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def resize_bgr_to_rgb(src, dst):
+        """
+        Nearest-neighbour resize of a BGR frame into an RGB buffer in a single pass
+        dst must be a preallocated (height, width, 3) uint8 array
+        """
+        src_h, src_w = src.shape[0], src.shape[1]
+        dst_h, dst_w = dst.shape[0], dst.shape[1]
+        for y in prange(dst_h):
+            sy = y * src_h // dst_h
+            for x in range(dst_w):
+                sx = x * src_w // dst_w
+                dst[y, x, 0] = src[sy, sx, 2]
+                dst[y, x, 1] = src[sy, sx, 1]
+                dst[y, x, 2] = src[sy, sx, 0]
+    
+    def warm_up():
+        """Compile the kernels ahead of the first video frame"""
+        resize_bgr_to_rgb(np.zeros((2, 2, 3), np.uint8), np.empty((2, 2, 3), np.uint8))
+else:
+    resize_bgr_to_rgb = None
+    
+    def warm_up():
+        """Nothing to compile without Numba"""
@@ -0,0 +1,171 @@
+"""
+Video Player Tests
+Compare random navigation and background decoding against a sequential decode
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+import unittest
+
+import cv2
+import numpy as np
+
+from video_player import VideoPlayer, PyAVPlayer, av
+
+
+FRAME_COUNT = 90
+FRAME_SIZE = (160, 120)
+
+
+def write_clip(path, fourcc):
+    """Write a short clip whose frames all differ"""
+    rng = np.random.default_rng(0)
+    width, height = FRAME_SIZE
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), 30, FRAME_SIZE)
+    for i in range(FRAME_COUNT):
+        frame = rng.integers(0, 64, (height, width, 3), dtype=np.uint8)
+        cv2.rectangle(frame, (i, 20), (i + 30, 60), (0, 0, 255), -1)
+        cv2.putText(frame, str(i), (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        writer.write(frame)
+    writer.release()
+
+
+def decode_opencv(path):
+    """Decode every frame of a clip sequentially with OpenCV"""
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+def decode_pyav(path):
+    """Decode every frame of a clip sequentially with PyAV"""
+    with av.open(path) as container:
+        return [frame.to_ndarray(format='bgr24') for frame in container.decode(video=0)]
+
+
+class VideoPlayerTest(unittest.TestCase):
+    """Navigation through VideoPlayer must return exactly the sequentially decoded frames"""
+    
+    player_cls = VideoPlayer
+    clips = (("clip.avi", "MJPG"), ("clip.mp4", "mp4v"))
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.paths = []
+        for name, fourcc in cls.clips:
+            path = os.path.join(cls.tmp_dir, name)
+            write_clip(path, fourcc)
+            cls.paths.append(path)
+    
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+    
+    def decode_reference(self, path):
+        return decode_opencv(path)
+    
+    def open_player(self, path):
+        player = self.player_cls()
+        success, error = player.load_video(path)
+        self.assertTrue(success, error)
+        self.addCleanup(player.release)
+        return player
+    
+    def assert_frame(self, player, reference, frame_idx):
+        player.current_frame = frame_idx
+        success, frame, used_cache = player.get_frame()
+        self.assertTrue(success)
+        self.assertFalse(used_cache, f"decode failed at frame {frame_idx}")
+        self.assertTrue(np.array_equal(frame, reference[frame_idx]), f"wrong frame at {frame_idx}")
+    
+    def test_random_navigation(self):
+        rng = random.Random(1)
+        for path in self.paths:
+            reference = self.decode_reference(path)
+            self.assertEqual(len(reference), FRAME_COUNT)
+            player = self.open_player(path)
+            
+            # Sequential steps, short grabs, long seeks, backward seeks and cache hits
+            sequence = [0, 1, 2, 10, 40, 39, 38, 85, 89, 0, 5, 64, 3, 3, 4, 65]
+            sequence += [rng.randrange(FRAME_COUNT) for _ in range(60)]
+            for frame_idx in sequence:
+                with self.subTest(path=path, frame=frame_idx):
+                    self.assert_frame(player, reference, frame_idx)
+    
+    def test_background_decoding(self):
+        for path in self.paths:
+            reference = self.decode_reference(path)
+            player = self.open_player(path)
+            self.assert_frame(player, reference, 20)
+            
+            # Play 30 frames, then stop and keep navigating on the main thread
+            player.start_decoding()
+            played = []
+            deadline = time.monotonic() + 10
+            while len(played) < 30 and time.monotonic() < deadline:
+                ready, frame = player.poll_decoded_frame()
+                if not ready:
+                    time.sleep(0.001)
+                    continue
+                self.assertIsNotNone(frame)
+                played.append(player.current_frame)
+                self.assertTrue(np.array_equal(frame, reference[player.current_frame]))
+            player.stop_decoding()
+            
+            self.assertEqual(played, list(range(21, 51)))
+            self.assertIsNone(player.decode_error)
+            for frame_idx in (51, 52, 10, 51, 80):
+                self.assert_frame(player, reference, frame_idx)
+    
+    def test_decoding_to_end(self):
+        player = self.open_player(self.paths[0])
+        player.current_frame = FRAME_COUNT - 5
+        player.get_frame()
+        player.start_decoding()
+        
+        played = []
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            ready, frame = player.poll_decoded_frame()
+            if not ready:
+                time.sleep(0.001)
+            elif frame is None:
+                break
+            else:
+                played.append(player.current_frame)
+        player.stop_decoding()
+        self.assertEqual(played, list(range(FRAME_COUNT - 4, FRAME_COUNT)))
+
+
+@unittest.skipIf(av is None, "PyAV is not installed")
+class PyAVPlayerTest(VideoPlayerTest):
+    """Same checks through PyAV's keyframe-aware seeking"""
+    
+    player_cls = PyAVPlayer
+    
+    def decode_reference(self, path):
+        return decode_pyav(path)
+
+
+class FormatTimestampTest(unittest.TestCase):
+    
+    def test_format_timestamp(self):
+        player = VideoPlayer()
+        self.assertEqual(player.format_timestamp(0), "00:00:00.000")
+        self.assertEqual(player.format_timestamp(2 / 30), "00:00:00.067")
+        self.assertEqual(player.format_timestamp(59.9996), "00:01:00.000")
+        self.assertEqual(player.format_timestamp(3723.0456), "01:02:03.046")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,17 +7,24 @@ Allows users to load videos, navigate through frames, and create timestamped ann
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
+import time
 import cv2
+import numpy as np
 from PIL import Image, ImageTk
 
-from video_player import VideoPlayer
+from video_player import create_player
 from annotation_manager import AnnotationManager
-from gui_builder import GUIBuilder
+from gui_builder import GUIBuilder, SKIP_BUTTONS, CANVAS_MAX_WIDTH, CANVAS_MAX_HEIGHT
+import numba_kernels
 
 
 class VideoAnnotationApp:
     """Main application controller"""
     
+    # Scale frames on an OpenCL device instead of the CPU (opt-in: each frame is uploaded at
+    # full resolution, which only pays off with a fast GPU, not with CPU OpenCL drivers)
+    use_opencl = False
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Video Annotation Tool")
@@ -29,7 +36,7 @@ class VideoAnnotationApp:
         self._setup_modern_theme()
         
         # Initialize components
-        self.player = VideoPlayer()
+        self.player = create_player(display_size=(CANVAS_MAX_WIDTH, CANVAS_MAX_HEIGHT))
         self.annotation_mgr = AnnotationManager()
         self.gui_builder = GUIBuilder(root)
         
@@ -37,10 +44,35 @@ class VideoAnnotationApp:
         self.is_playing = False
         self.playback_id = None
         self.photo = None  # Keep reference to prevent garbage collection
-        
-        # Build GUI and connect events
-        self.widgets = self.gui_builder.build_gui()
-        self._connect_events()
+        self._resize_buf = None  # Canvas-sized RGB buffer reused across frames
+        self._img_id = None  # Canvas image item showing self.photo
+        
+        # Playback clock: frame _playback_frame0 is due at _playback_t0 (perf_counter seconds)
+        self._playback_t0 = 0.0
+        self._playback_frame0 = 0
+        self._frame_period = 0.0
+        
+        # Latest scrub position waiting to be drawn
+        self._pending_seek_frame = None
+        self._seek_scheduled = False
+        
+        # Last texts pushed to the timestamp and frame labels
+        self._timestamp_text = None
+        self._frame_text = None
+        
+        # Leave OpenCV's global OpenCL setting untouched unless the OpenCL path is used
+        self._use_opencl = self.use_opencl and cv2.ocl.haveOpenCL()
+        if self._use_opencl:
+            cv2.ocl.setUseOpenCL(True)
+            self._use_opencl = cv2.ocl.useOpenCL()
+        self._resize_umat = None  # Device-side counterpart of _resize_buf
+        
+        # Annotation history currently shown in the combobox
+        self._history_version = 0
+        self._history_values = ()
+        
+        # Build GUI and connect events once all sections exist
+        self.widgets = self.gui_builder.build_gui(on_ready=self._connect_events)
     
     def _setup_modern_theme(self):
         """Setup modern color scheme and styling"""
@@ -102,34 +134,30 @@ class VideoAnnotationApp:
     def _connect_events(self):
         """Connect UI events to handlers"""
         # File controls
-        self.widgets['load_btn'].config(command=self.load_video)
-        self.widgets['annot_dir_btn'].config(command=self.set_annotation_dir)
+        self.widgets.load_btn.config(command=self.load_video)
+        self.widgets.annot_dir_btn.config(command=self.set_annotation_dir)
         
         # Playback controls
-        self.widgets['play_btn'].config(command=self.toggle_playback)
+        self.widgets.play_btn.config(command=self.toggle_playback)
         
         # Frame navigation
-        self.widgets['prev_frame_btn'].config(command=self.previous_frame)
-        self.widgets['next_frame_btn'].config(command=self.next_frame)
+        self.widgets.prev_frame_btn.config(command=self.previous_frame)
+        self.widgets.next_frame_btn.config(command=self.next_frame)
         
         # Time skip controls
-        self.widgets['skip_30s_back_btn'].config(command=lambda: self.skip_time(-30))
-        self.widgets['skip_5s_back_btn'].config(command=lambda: self.skip_time(-5))
-        self.widgets['skip_1s_back_btn'].config(command=lambda: self.skip_time(-1))
-        self.widgets['skip_1s_fwd_btn'].config(command=lambda: self.skip_time(1))
-        self.widgets['skip_5s_fwd_btn'].config(command=lambda: self.skip_time(5))
-        self.widgets['skip_30s_fwd_btn'].config(command=lambda: self.skip_time(30))
+        for name, _, seconds in SKIP_BUTTONS:
+            getattr(self.widgets, name).config(command=lambda s=seconds: self.skip_time(s))
         
         # Annotation controls
-        self.widgets['start_btn'].config(command=self.mark_start)
-        self.widgets['end_btn'].config(command=self.mark_end_and_save)
-        self.widgets['clear_btn'].config(command=self.clear_markers)
-        self.widgets['annotation_combo'].bind("<<ComboboxSelected>>", self.on_history_selected)
+        self.widgets.start_btn.config(command=self.mark_start)
+        self.widgets.end_btn.config(command=self.mark_end_and_save)
+        self.widgets.clear_btn.config(command=self.clear_markers)
+        self.widgets.annotation_combo.bind("<<ComboboxSelected>>", self.on_history_selected)
         
         # Navigation bar
-        self.widgets['nav_scale'].config(command=self.on_nav_scale_change)
+        self.widgets.nav_scale.config(command=self.on_nav_scale_change)
         self.is_nav_scale_drag = False
-        self.widgets['nav_scale'].bind("<Button-1>", self.on_nav_scale_click)
+        self.widgets.nav_scale.bind("<Button-1>", self.on_nav_scale_click)
     
     def load_video(self):
         """Load a video file"""
@@ -144,15 +172,29 @@ class VideoAnnotationApp:
         if not file_path:
             return
         
+        # Stop playback of the current video
+        if self.is_playing:
+            self.toggle_playback()
+        
         success, error = self.player.load_video(file_path)
         
         if not success:
             messagebox.showerror("Error", error)
             return
         
+        self.annotation_mgr.set_video_path(file_path)
+        
+        # Fit the canvas to the video and apply the new size before drawing
+        self.gui_builder.resize_canvas(self.player.frame_width, self.player.frame_height)
+        self.root.update_idletasks()
+        
+        # Compile the optional Numba kernel before the first frame if it will enlarge this video
+        if self.player.frame_width <= CANVAS_MAX_WIDTH and self.player.frame_height <= CANVAS_MAX_HEIGHT:
+            numba_kernels.warm_up()
+        
         # Update UI
-        self.widgets['file_label'].config(text=os.path.basename(file_path))
-        self.widgets['nav_scale'].config(to=self.player.total_frames - 1)
+        self.widgets.file_label.config(text=os.path.basename(file_path))
+        self.widgets.nav_scale.config(to=self.player.total_frames - 1)
         self.display_frame()
         self.update_status(f"Video loaded: {self.player.total_frames} frames at {self.player.fps:.2f} fps")
     
@@ -166,11 +208,12 @@ class VideoAnnotationApp:
         if not success:
             return
         
-        # Convert BGR to RGB
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
+        self._render_frame(frame, used_cache)
+    
+    def _render_frame(self, frame, used_cache=False):
+        """Scale a decoded frame onto the canvas and refresh the position displays"""
         # Resize frame to fit canvas
-        canvas = self.widgets['canvas']
+        canvas = self.widgets.canvas
         canvas_width = canvas.winfo_width()
         canvas_height = canvas.winfo_height()
         
@@ -186,18 +229,50 @@ class VideoAnnotationApp:
         new_width = int(self.player.frame_width * scale)
         new_height = int(self.player.frame_height * scale)
         
-        # Resize frame
-        frame_resized = cv2.resize(frame_rgb, (new_width, new_height))
+        # Reallocate the output buffer and photo only when the display size changes
+        buf = self._resize_buf
+        if buf is None or buf.shape[0] != new_height or buf.shape[1] != new_width:
+            buf = self._resize_buf = np.empty((new_height, new_width, 3), np.uint8)
+            self._resize_umat = None
+            self.photo = None
+        
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        if self._use_opencl:
+            # Resize on the OpenCL device into a reused output, downloading only the small result
+            if self._resize_umat is None:
+                self._resize_umat = cv2.UMat(new_height, new_width, cv2.CV_8UC3)
+            cv2.resize(cv2.UMat(frame), (new_width, new_height), dst=self._resize_umat,
+                       interpolation=interpolation)
+            
+            # get() always returns a new array - PIL swaps BGR to RGB while unpacking it
+            img = Image.frombuffer("RGB", (new_width, new_height), self._resize_umat.get(), "raw", "BGR", 0, 1)
+        elif scale >= 1 and numba_kernels.resize_bgr_to_rgb is not None:
+            # Fused resize and BGR to RGB swap, reading each source pixel once - nearest-neighbour
+            # only when enlarging, as it would drop detail when shrinking
+            numba_kernels.resize_bgr_to_rgb(frame, buf)
+            img = Image.fromarray(buf)
+        else:
+            cv2.resize(frame, (new_width, new_height), dst=buf, interpolation=interpolation)
+            
+            # PIL swaps BGR to RGB while unpacking the buffer, replacing a separate cvtColor pass
+            img = Image.frombuffer("RGB", (new_width, new_height), buf, "raw", "BGR", 0, 1)
         
-        # Convert to PIL Image
-        img = Image.fromarray(frame_resized)
-        self.photo = ImageTk.PhotoImage(image=img)
+        # Upload into the existing photo if possible
+        new_photo = self.photo is None
+        if new_photo:
+            self.photo = ImageTk.PhotoImage(image=img)
+        else:
+            self.photo.paste(img)
         
-        # Display on canvas
-        canvas.delete("all")
+        # Display on canvas, reusing the image item
         x = (canvas_width - new_width) // 2
         y = (canvas_height - new_height) // 2
-        canvas.create_image(x, y, anchor=tk.NW, image=self.photo)
+        if self._img_id is None:
+            self._img_id = canvas.create_image(x, y, anchor=tk.NW, image=self.photo)
+        else:
+            canvas.coords(self._img_id, x, y)
+            if new_photo:
+                canvas.itemconfig(self._img_id, image=self.photo)
         
         # Update timestamp and frame info
         self.update_timestamp_display()
@@ -213,9 +288,15 @@ class VideoAnnotationApp:
         
         timestamp_seconds = self.player.get_current_timestamp()
         timestamp_str = self.player.format_timestamp(timestamp_seconds)
-        
-        self.widgets['timestamp_label'].config(text=timestamp_str)
-        self.widgets['frame_label'].config(text=f"{self.player.current_frame} / {self.player.total_frames}")
+        frame_str = f"{self.player.current_frame} / {self.player.total_frames}"
+        
+        # Skip Tk configure calls when the text did not change
+        if timestamp_str != self._timestamp_text:
+            self._timestamp_text = timestamp_str
+            self.widgets.timestamp_label.config(text=timestamp_str)
+        if frame_str != self._frame_text:
+            self._frame_text = frame_str
+            self.widgets.frame_label.config(text=frame_str)
     
     def update_nav_scale(self):
         """Update navigation bar position without triggering callback"""
@@ -224,7 +305,7 @@ class VideoAnnotationApp:
         
         # Only update if not being dragged by user
         if not self.is_nav_scale_drag:
-            self.widgets['nav_scale'].set(self.player.current_frame)
+            self.widgets.nav_scale.set(self.player.current_frame)
     
     def on_nav_scale_click(self, event):
         """Handle navigation bar click or drag"""
@@ -242,7 +323,7 @@ class VideoAnnotationApp:
         self.is_nav_scale_drag = True
         
         # Calculate frame from click position
-        scale_widget = self.widgets['nav_scale']
+        scale_widget = self.widgets.nav_scale
         scale_width = scale_widget.winfo_width()
         click_x = event.x
         
@@ -267,7 +348,7 @@ class VideoAnnotationApp:
         if not self.player.is_loaded():
             return
         
-        scale_widget = self.widgets['nav_scale']
+        scale_widget = self.widgets.nav_scale
         scale_width = scale_widget.winfo_width()
         drag_x = event.x
         
@@ -276,23 +357,41 @@ class VideoAnnotationApp:
             frame_num = int((drag_x / scale_width) * self.player.total_frames)
             frame_num = max(0, min(frame_num, self.player.total_frames - 1))
             
-            # Update player and display
-            if frame_num != self.player.current_frame:
-                self.player.current_frame = frame_num
-                self.display_frame()
+            # Draw only the latest position once pending motion events are handled
+            self._pending_seek_frame = frame_num
+            if not self._seek_scheduled:
+                self._seek_scheduled = True
+                self.root.after_idle(self._flush_pending_seek)
+    
+    def _flush_pending_seek(self):
+        """Display the most recent frame requested while dragging the navigation bar"""
+        self._seek_scheduled = False
+        frame_num = self._pending_seek_frame
+        self._pending_seek_frame = None
+        
+        # The decode thread owns the capture during playback
+        if frame_num is None or self.is_playing or not self.player.is_loaded():
+            return
+        
+        if frame_num != self.player.current_frame:
+            self.player.current_frame = frame_num
+            self.display_frame()
     
     def on_nav_scale_release(self, event):
         """Handle navigation bar release"""
         self.is_nav_scale_drag = False
         
+        # Draw the final drag position before playback hands the capture to the decode thread
+        self._flush_pending_seek()
+        
         # Resume playback if it was playing before
         if hasattr(self, 'was_playing_before_nav') and self.was_playing_before_nav:
             if not self.is_playing:
                 self.toggle_playback()
         
         # Unbind drag events
-        self.widgets['nav_scale'].unbind("<B1-Motion>")
-        self.widgets['nav_scale'].unbind("<ButtonRelease-1>")
+        self.widgets.nav_scale.unbind("<B1-Motion>")
+        self.widgets.nav_scale.unbind("<ButtonRelease-1>")
     
     def on_nav_scale_change(self, value):
         """Handle navigation bar position change"""
@@ -307,30 +406,60 @@ class VideoAnnotationApp:
         self.is_playing = not self.is_playing
         
         if self.is_playing:
-            self.widgets['play_btn'].config(text="⏸ Pause")
+            self.widgets.play_btn.config(text="⏸ Pause")
+            self._playback_t0 = time.perf_counter()
+            self._playback_frame0 = self.player.current_frame + 1
+            self._frame_period = (1.0 / self.player.fps if self.player.fps > 0
+                                  else self.player.frame_delay_ms / 1000.0)
+            self.player.start_decoding()
             self.play_video()
         else:
-            self.widgets['play_btn'].config(text="▶ Play")
+            self.widgets.play_btn.config(text="▶ Play")
             if self.playback_id is not None:
                 self.root.after_cancel(self.playback_id)
                 self.playback_id = None
+            self.player.stop_decoding()
     
     def play_video(self):
-        """Continuously play video frames"""
+        """Continuously play frames produced by the decode thread"""
         if not self.is_playing:
             return
         
-        if self.player.next_frame():
-            self.display_frame()
-            
-            # Calculate delay based on fps
-            delay = int(1000 / self.player.fps) if self.player.fps > 0 else 33
-            self.playback_id = self.root.after(delay, self.play_video)
+        ready, frame = self.player.poll_decoded_frame()
+        at_end = ready and frame is None
+        
+        # More than a frame behind the clock - drop queued frames instead of rendering them
+        while ready and not at_end and self._frames_behind() > 1:
+            ready, newer = self.player.poll_decoded_frame()
+            if newer is not None:
+                frame = newer
+            at_end = ready and newer is None
+        
+        if frame is not None:
+            self._render_frame(frame)
+        
+        if frame is None and not at_end:
+            # Decoder has not caught up yet - check again shortly
+            self.playback_id = self.root.after(5, self.play_video)
+        elif not at_end:
+            # Wait until the next frame is due rather than a fixed delay, so playback does not drift
+            frames_played = self.player.current_frame + 1 - self._playback_frame0
+            next_due = self._playback_t0 + frames_played * self._frame_period
+            delay_ms = max(1, int((next_due - time.perf_counter()) * 1000))
+            self.playback_id = self.root.after(delay_ms, self.play_video)
         else:
-            # Reached end of video
+            # Reached end of video, or decoding failed
             self.is_playing = False
-            self.widgets['play_btn'].config(text="▶ Play")
+            self.player.stop_decoding()
+            self.widgets.play_btn.config(text="▶ Play")
             self.playback_id = None
+            if self.player.decode_error:
+                self.update_status(f"Playback stopped: {self.player.decode_error}")
+    
+    def _frames_behind(self):
+        """Number of frame periods the current frame lags the playback clock"""
+        elapsed = time.perf_counter() - self._playback_t0
+        return elapsed / self._frame_period - (self.player.current_frame - self._playback_frame0)
     
     def next_frame(self):
         """Go to next frame"""
@@ -382,7 +511,7 @@ class VideoAnnotationApp:
                 display_path = "..." + directory[-47:]
             else:
                 display_path = directory
-            self.widgets['annot_dir_label'].config(text=display_path, foreground="#51cf66")
+            self.widgets.annot_dir_label.config(text=display_path, foreground="#51cf66")
             self.update_status(f"Annotation directory set to: {directory}")
     
     def mark_start(self):
@@ -394,7 +523,7 @@ class VideoAnnotationApp:
         timestamp = self.player.get_current_timestamp()
         self.annotation_mgr.set_start(timestamp)
         timestamp_str = self.player.format_timestamp(timestamp)
-        self.widgets['start_label'].config(text=timestamp_str, foreground="#51cf66")
+        self.widgets.start_label.config(text=timestamp_str, foreground="#51cf66")
         self.update_status(f"Start marked at {timestamp_str}")
     
     def mark_end_and_save(self):
@@ -407,7 +536,7 @@ class VideoAnnotationApp:
             messagebox.showwarning("Warning", "Please mark start timestamp first")
             return
         
-        annotation_text = self.widgets['annotation_entry'].get().strip()
+        annotation_text = self.widgets.annotation_entry.get().strip()
         if not annotation_text:
             messagebox.showwarning("Warning", "Please enter an annotation")
             return
@@ -435,33 +564,37 @@ class VideoAnnotationApp:
         
         # Update annotation history
         self.annotation_mgr.add_to_history(annotation_text)
-        self.widgets['annotation_combo']['values'] = self.annotation_mgr.get_history()
+        version, new_items = self.annotation_mgr.history_delta(self._history_version)
+        if new_items:
+            self._history_version = version
+            self._history_values += tuple(new_items)
+            self.widgets.annotation_combo['values'] = self._history_values
         
         # Update UI
-        self.widgets['end_label'].config(text=end_str, foreground="#51cf66")
+        self.widgets.end_label.config(text=end_str, foreground="#51cf66")
         self.update_status(f"Annotation saved: {start_str} to {end_str}")
         
         # Show success and clear for next annotation
         messagebox.showinfo("Success", f"Annotation saved to:\n{file_path}")
-        self.widgets['annotation_entry'].delete(0, tk.END)
+        self.widgets.annotation_entry.delete(0, tk.END)
     
     def clear_markers(self):
         """Clear start and end markers"""
         self.annotation_mgr.clear_start()
-        self.widgets['start_label'].config(text="Not set", foreground="#ff6b6b")
-        self.widgets['end_label'].config(text="Not set", foreground="#ff6b6b")
+        self.widgets.start_label.config(text="Not set", foreground="#ff6b6b")
+        self.widgets.end_label.config(text="Not set", foreground="#ff6b6b")
         self.update_status("Markers cleared")
     
     def on_history_selected(self, event):
         """Handle annotation history selection"""
-        selected = self.widgets['annotation_combo'].get()
+        selected = self.widgets.annotation_combo.get()
         if selected:
-            self.widgets['annotation_entry'].delete(0, tk.END)
-            self.widgets['annotation_entry'].insert(0, selected)
+            self.widgets.annotation_entry.delete(0, tk.END)
+            self.widgets.annotation_entry.insert(0, selected)
     
     def update_status(self, message):
         """Update status bar"""
-        self.widgets['status_bar'].config(text=message)
+        self.widgets.status_bar.config(text=message)
     
     def cleanup(self):
         """Cleanup resources"""
@@ -473,6 +606,9 @@ class VideoAnnotationApp:
         
         # Release video
         self.player.release()
+        
+        # Close annotation files
+        self.annotation_mgr.close()
 
 
 def main():
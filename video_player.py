@@ -3,23 +3,51 @@ Video Player Module
 Handles video loading, frame reading, and playback control
 """
 
+import itertools
+import os
+import queue
+import threading
+from collections import OrderedDict
 import cv2
-from datetime import timedelta
+import numpy as np
+
+try:
+    import av
+except ImportError:
+    # PyAV is optional - create_player() falls back to OpenCV without it
+    av = None
 
 
 class VideoPlayer:
     """Manages video file operations and frame navigation"""
     
+    keyframe_interval = 30  # Typical GOP size
+    max_grab_frames = 2 * keyframe_interval  # Longer forward jumps seek instead
+    frame_cache_size = 32  # Recently decoded frames kept for back-and-forth navigation
+    frame_cache_bytes = 96 * 1024 * 1024  # About 16 frames at 1080p, 4 at 4K
+    decode_queue_size = 2  # Frames the decode thread may run ahead of playback
+    decode_ring_size = decode_queue_size + 2  # Queued frames, one being decoded and one on screen
+    
     def __init__(self):
         self.video_capture = None
         self.video_path = None
         self.current_frame = 0
         self.total_frames = 0
         self.fps = 0
+        self.frame_delay_ms = 33  # Playback delay between frames
         self.frame_width = 0
         self.frame_height = 0
         self.last_valid_frame = None
         self.last_read_position = -1
+        self._frame_cache = OrderedDict()  # frame index -> frame, least recently used first
+        self._frame_cache_nbytes = 0
+        
+        # Background decoding for playback
+        self._frame_queue = None
+        self._decode_thread = None
+        self._stop_decoding = threading.Event()
+        self._ring = None  # Preallocated frames the decode thread reads into
+        self.decode_error = None  # Message of the exception that ended background decoding
         
     def load_video(self, file_path):
         """
@@ -27,23 +55,23 @@ class VideoPlayer:
         Returns: tuple (success: bool, error_message: str or None)
         """
         # Release previous video if any
+        self.stop_decoding()
         if self.video_capture is not None:
             self.video_capture.release()
         
-        # Open new video with backend that handles H264 better
-        self.video_capture = cv2.VideoCapture(file_path, cv2.CAP_FFMPEG)
+        self.video_capture = self._open_capture(file_path)
         
-        if not self.video_capture.isOpened():
-            # Fallback to default backend
-            self.video_capture = cv2.VideoCapture(file_path)
-        
-        if not self.video_capture.isOpened():
+        if self.video_capture is None:
             return False, "Failed to open video file"
         
+        # Keep at most one frame queued inside the capture (ignored by backends without a buffer)
+        self.video_capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        
         # Get video properties
         self.video_path = file_path
         self.total_frames = int(self.video_capture.get(cv2.CAP_PROP_FRAME_COUNT))
         self.fps = self.video_capture.get(cv2.CAP_PROP_FPS)
+        self.frame_delay_ms = max(1, int(round(1000.0 / self.fps))) if self.fps > 0 else 33
         self.frame_width = int(self.video_capture.get(cv2.CAP_PROP_FRAME_WIDTH))
         self.frame_height = int(self.video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
         
@@ -51,42 +79,97 @@ class VideoPlayer:
         self.current_frame = 0
         self.last_valid_frame = None
         self.last_read_position = -1
+        self._frame_cache.clear()
+        self._frame_cache_nbytes = 0
+        
+        # Only OpenCV captures can decode into a caller-supplied array
+        self._ring = None
+        if isinstance(self.video_capture, cv2.VideoCapture) and self.frame_width and self.frame_height:
+            self._ring = np.empty((self.decode_ring_size, self.frame_height, self.frame_width, 3), np.uint8)
         
         return True, None
     
+    def _open_capture(self, file_path):
+        """
+        Open a capture for the given file
+        Returns: cv2.VideoCapture-like object or None if the file cannot be opened
+        """
+        # Open new video with backend that handles H264 better
+        params = self._capture_params()
+        if params:
+            capture = cv2.VideoCapture(file_path, cv2.CAP_FFMPEG, params)
+        else:
+            capture = cv2.VideoCapture(file_path, cv2.CAP_FFMPEG)
+        
+        if not capture.isOpened():
+            # Fallback to default backend
+            capture = cv2.VideoCapture(file_path)
+        
+        return capture if capture.isOpened() else None
+    
+    def _capture_params(self):
+        """Open parameters for the FFmpeg backend (empty on OpenCV versions without them)"""
+        params = []
+        if hasattr(cv2, 'CAP_PROP_N_THREADS'):
+            # Decode with one thread per core
+            params += [cv2.CAP_PROP_N_THREADS, os.cpu_count() or 1]
+        if hasattr(cv2, 'CAP_PROP_HW_ACCELERATION'):
+            # Decode on the GPU when FFmpeg finds a usable device, silently using the CPU otherwise
+            params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        return params
+    
     def get_frame(self):
         """
         Get the current frame
+        The returned frame may be shared with the player's cache and must not be modified.
         Returns: tuple (success: bool, frame: numpy array or None, used_cache: bool)
         """
         if self.video_capture is None:
             return False, None, False
         
-        # For sequential frame access, read sequentially
-        if abs(self.current_frame - self.last_read_position) == 1:
-            if self.current_frame > self.last_read_position:
-                # Moving forward - just read next
-                ret, frame = self.video_capture.read()
-            else:
-                # Moving backward - need to seek
+        frame = self._frame_cache.get(self.current_frame)
+        if frame is not None:
+            # Recently visited - no decoding, and the capture position is left alone
+            self._frame_cache.move_to_end(self.current_frame)
+            self.last_valid_frame = frame
+            return True, frame, False
+        
+        delta = self.current_frame - self.last_read_position
+        if delta == 1:
+            # Sequential access - just read next
+            ret, frame = self.video_capture.read()
+        elif 1 < delta <= self.max_grab_frames:
+            # Short forward jump - skip intermediate frames without converting them
+            ret, frame = self._grab_and_retrieve(delta - 1)
+            if not ret:
                 ret, frame = self._seek_and_read()
         else:
-            # Non-sequential access - need to seek
+            # Backward or long jump - need to seek
             ret, frame = self._seek_and_read()
         
         if not ret or frame is None:
             # Use last valid frame if available
             if self.last_valid_frame is not None:
-                frame = self.last_valid_frame.copy()
-                return True, frame, True  # Indicate we used cache
+                return True, self.last_valid_frame, True  # Indicate we used cache
             else:
                 return False, None, False
         else:
-            # Cache this valid frame
-            self.last_valid_frame = frame.copy()
+            # Cache this valid frame - read() returns a fresh array, so no copy is needed
+            self.last_valid_frame = frame
             self.last_read_position = self.current_frame
+            self._cache_frame(self.current_frame, frame)
             return True, frame, False
     
+    def _cache_frame(self, frame_index, frame):
+        """Add a decoded frame to the LRU cache, evicting the oldest frames over the limits"""
+        cache = self._frame_cache
+        cache[frame_index] = frame
+        self._frame_cache_nbytes += frame.nbytes
+        while len(cache) > 1 and (len(cache) > self.frame_cache_size or
+                                  self._frame_cache_nbytes > self.frame_cache_bytes):
+            _, evicted = cache.popitem(last=False)
+            self._frame_cache_nbytes -= evicted.nbytes
+    
     def _seek_and_read(self):
         """Helper method to seek and read frame with error recovery"""
         # Try direct seek
@@ -97,24 +180,115 @@ class VideoPlayer:
             return ret, frame
         
         # If direct seek fails, try seeking back to keyframe and reading forward
-        keyframe_interval = 30  # Typical GOP size
-        seek_back = min(self.current_frame, keyframe_interval)
+        seek_back = min(self.current_frame, self.keyframe_interval)
         
         if seek_back > 0:
             start_frame = self.current_frame - seek_back
             self.video_capture.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
             
-            # Read forward to target frame
-            for i in range(seek_back + 1):
-                ret, frame = self.video_capture.read()
-                if not ret:
-                    break
-            
+            # Advance to target frame, only converting the last one
+            ret, frame = self._grab_and_retrieve(seek_back)
             if ret:
                 return ret, frame
         
         return False, None
     
+    def _grab_and_retrieve(self, skip_count):
+        """Skip frames with grab() (no BGR conversion) and retrieve the next one"""
+        capture = self.video_capture
+        for _ in range(skip_count + 1):
+            if not capture.grab():
+                return False, None
+        return capture.retrieve()
+    
+    def start_decoding(self):
+        """Start decoding the frames after the current one on a background thread"""
+        self.stop_decoding()
+        if self.video_capture is None:
+            return
+        
+        # A small bounded queue keeps the decoder only a few frames ahead
+        self._stop_decoding.clear()
+        self.decode_error = None
+        self._frame_queue = queue.Queue(maxsize=self.decode_queue_size)
+        self._decode_thread = threading.Thread(target=self._decode_worker,
+                                               args=(self.current_frame + 1,), daemon=True)
+        self._decode_thread.start()
+    
+    def stop_decoding(self):
+        """Stop the decode thread and discard any frames it queued"""
+        if self._decode_thread is None:
+            return
+        self._stop_decoding.set()
+        self._decode_thread.join()
+        self._decode_thread = None
+        self._frame_queue = None
+        
+        if self._ring is not None and self.last_valid_frame is not None:
+            # The shown frame may live in a ring slot that the next playback overwrites
+            self.last_valid_frame = self.last_valid_frame.copy()
+    
+    def _decode_worker(self, start_frame):
+        """Read frames sequentially into the frame queue until stopped or at end of video"""
+        capture = self.video_capture
+        stop = self._stop_decoding
+        
+        try:
+            if start_frame != self.last_read_position + 1:
+                capture.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+                self.last_read_position = start_frame - 1
+            
+            ring = self._ring
+            frame_idx = start_frame
+            while not stop.is_set() and frame_idx < self.total_frames:
+                if ring is not None:
+                    # Decode in place into the oldest slot - that frame has already been shown
+                    ret, frame = capture.read(ring[(frame_idx - start_frame) % len(ring)])
+                else:
+                    ret, frame = capture.read()
+                if not ret:
+                    break
+                
+                self.last_read_position = frame_idx
+                self._queue_decoded((frame_idx, frame))
+                frame_idx += 1
+        except Exception as e:
+            # Reported through decode_error once the end marker below is polled
+            self.decode_error = str(e)
+        finally:
+            self._queue_decoded((None, None))  # End of video
+    
+    def _queue_decoded(self, item):
+        """Block while the frame queue is full, but keep checking for stop requests"""
+        frames = self._frame_queue
+        stop = self._stop_decoding
+        while not stop.is_set():
+            try:
+                frames.put(item, timeout=0.05)
+                return
+            except queue.Full:
+                pass
+    
+    def poll_decoded_frame(self):
+        """
+        Take the next frame produced by the decode thread without blocking
+        Returns: tuple (ready: bool, frame: numpy array or None) - frame is None at end of video
+        or when decoding failed, in which case decode_error is set
+        """
+        frames = self._frame_queue
+        if frames is None:
+            return False, None
+        
+        try:
+            frame_idx, frame = frames.get_nowait()
+        except queue.Empty:
+            return False, None
+        
+        if frame is not None:
+            self.current_frame = frame_idx
+            self.last_valid_frame = frame
+        return True, frame
+    
     def next_frame(self):
         """Move to next frame"""
         if self.current_frame < self.total_frames - 1:
@@ -154,11 +328,11 @@ class VideoPlayer:
     
     def format_timestamp(self, seconds):
         """Format seconds to HH:MM:SS.mmm"""
-        td = timedelta(seconds=seconds)
-        hours = int(td.total_seconds() // 3600)
-        minutes = int((td.total_seconds() % 3600) // 60)
-        secs = td.total_seconds() % 60
-        return f"{hours:02d}:{minutes:02d}:{secs:06.3f}"
+        ms = int(seconds * 1000 + 0.5)  # Timestamps are never negative
+        hours, ms = divmod(ms, 3600000)
+        minutes, ms = divmod(ms, 60000)
+        secs, ms = divmod(ms, 1000)
+        return "%02d:%02d:%02d.%03d" % (hours, minutes, secs, ms)
     
     def is_loaded(self):
         """Check if a video is loaded"""
@@ -166,6 +340,172 @@ class VideoPlayer:
     
     def release(self):
         """Release video resources"""
+        self.stop_decoding()
         if self.video_capture is not None:
             self.video_capture.release()
             self.video_capture = None
+
+
+def _lowres_level(width, height, display_size):
+    """
+    Number of times a video can be halved while decoding and still cover the display box
+    Returns: int from 0 (full resolution) to 3, the most FFmpeg decoders support
+    """
+    if display_size is None:
+        return 0
+    box_width, box_height = display_size
+    level = 0
+    # The fitted video fills the box in at least one dimension, which must not be upscaled
+    while level < 3 and (width >> (level + 1) >= box_width or height >> (level + 1) >= box_height):
+        level += 1
+    return level
+
+
+class _PyAVCapture:
+    """Subset of the cv2.VideoCapture interface backed by PyAV with keyframe-aware seeking"""
+    
+    def __init__(self, file_path, display_size=None):
+        self.container = av.open(file_path)
+        try:
+            self._open_stream(display_size)
+        except Exception:
+            # The caller falls back to another backend - do not leak the open file
+            self.container.close()
+            raise
+    
+    def _open_stream(self, display_size):
+        """Set up decoding of the first video stream and decode its first frame"""
+        self.stream = self.container.streams.video[0]
+        self.stream.thread_type = 'AUTO'
+        
+        codec = self.stream.codec_context
+        lowres = _lowres_level(codec.width, codec.height, display_size)
+        if lowres:
+            # Decoders without lowres support (e.g. H.264) ignore the option
+            codec.options = {'lowres': str(lowres)}
+        
+        rate = self.stream.average_rate or self.stream.guessed_rate
+        self.fps = float(rate) if rate else 0.0
+        self.start_pts = self.stream.start_time or 0
+        self.frame_count = self.stream.frames or self._estimate_frame_count()
+        
+        self._frames = self.container.decode(self.stream)
+        self._grabbed = None
+        self._position = 0  # Index of the next frame to be grabbed
+        
+        # Take the frame size from the decoder output, which lowres shrinks
+        first = next(self._frames, None)
+        if first is not None:
+            self.width, self.height = first.width, first.height
+            self._frames = itertools.chain((first,), self._frames)
+        else:
+            self.width = self.stream.codec_context.width
+            self.height = self.stream.codec_context.height
+    
+    def _estimate_frame_count(self):
+        """Estimate the frame count from the duration when the container does not store it"""
+        if self.stream.duration:
+            return int(self.stream.duration * self.stream.time_base * self.fps)
+        if self.container.duration:
+            return int(self.container.duration / av.time_base * self.fps)
+        return 0
+    
+    def isOpened(self):
+        return self.container is not None
+    
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return self.frame_count
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return self._position
+        return 0
+    
+    def set(self, prop_id, value):
+        if prop_id != cv2.CAP_PROP_POS_FRAMES or self.fps <= 0:
+            return False
+        return self._seek(int(value))
+    
+    def _seek(self, frame_idx):
+        """Seek to the keyframe before frame_idx and decode forward up to it"""
+        ticks_per_frame = 1 / (self.fps * self.stream.time_base)
+        target_pts = self.start_pts + int(round(frame_idx * ticks_per_frame))
+        
+        try:
+            self.container.seek(target_pts, stream=self.stream, backward=True, any_frame=False)
+            frames = self.container.decode(self.stream)
+            for frame in frames:
+                if frame.pts is None or frame.pts >= target_pts - ticks_per_frame / 2:
+                    # Hand the target frame to the next grab()
+                    self._frames = itertools.chain((frame,), frames)
+                    self._position = frame_idx
+                    self._grabbed = None
+                    return True
+        except av.error.FFmpegError:
+            pass
+        return False
+    
+    def grab(self):
+        try:
+            self._grabbed = next(self._frames)
+        except (StopIteration, av.error.FFmpegError):
+            self._grabbed = None
+            return False
+        self._position += 1
+        return True
+    
+    def retrieve(self, image=None):
+        if self._grabbed is None:
+            return False, None
+        return True, self._grabbed.to_ndarray(format='bgr24')
+    
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+    
+    def release(self):
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+
+
+class PyAVPlayer(VideoPlayer):
+    """VideoPlayer decoding through PyAV, falling back to OpenCV for files PyAV cannot open"""
+    
+    def __init__(self, display_size=None):
+        super().__init__()
+        # Largest (width, height) frames are shown at, None keeps full resolution
+        self.display_size = display_size
+    
+    def _open_capture(self, file_path):
+        if av is not None:
+            try:
+                return _PyAVCapture(file_path, self.display_size)
+            except (av.error.FFmpegError, IndexError):
+                # No decodable video stream - let OpenCV try
+                pass
+        return super()._open_capture(file_path)
+
+
+def create_player(display_size=None, prefer_gpu=False):
+    """
+    Create the best available video player (PyAV, then OpenCV)
+    display_size: (width, height) box frames are shown in, letting large videos decode
+    at reduced resolution; None decodes full-size frames
+    prefer_gpu: try NVDEC first (experimental, not yet verified on NVIDIA hardware)
+    """
+    if prefer_gpu:
+        # Imported here as gpu_player builds on this module
+        from gpu_player import NvDecPlayer, nvc
+        
+        if nvc is not None:
+            return NvDecPlayer(display_size=display_size)
+    if av is not None:
+        return PyAVPlayer(display_size)
+    return VideoPlayer()